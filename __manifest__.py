@@ -23,7 +23,7 @@
         ],
     },
     'external_dependencies': {
-        'python': ['google.cloud.bigquery', 'google.cloud.aiplatform'],
+        'python': ['google.cloud.bigquery', 'google.cloud.aiplatform', 'sqlglot'],
     },
     'demo': [],
     'installable': True,
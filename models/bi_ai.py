@@ -19,6 +19,27 @@ except ImportError:
     service_account = None
     vertexai = None
 
+try:
+    import sqlglot
+    from sqlglot import exp
+    from sqlglot.errors import SqlglotError
+    from sqlglot.optimizer.qualify import qualify
+    from sqlglot.optimizer.pushdown_projections import pushdown_projections
+except ImportError:
+    sqlglot = None
+
+# Maximum rows fetched per chart type for ranked (top-N) queries: a pie with
+# hundreds of slices is unreadable. This bounds the rows transferred and
+# rendered, not the bytes scanned, which BigQuery bills regardless of LIMIT.
+CHART_ROW_LIMITS = {
+    'bar': 50,
+    'line': 1000,
+    'pie': 12,
+    'doughnut': 12,
+    'polarArea': 12,
+    'radar': 12,
+}
+
 class BiDashboardItem(models.Model):
     _name = 'bi.dashboard.item'
     _description = 'BI Dashboard Item'
@@ -51,25 +72,160 @@ class BiDashboardItem(models.Model):
         except Exception as e:
             raise UserError(_("Failed to create BigQuery Client: %s") % str(e))
 
-    def _get_schema_summary(self, client, dataset_id):
-        """Fetch schema summary for the context."""
-        schema_summary = ""
+    def _get_schema_map(self, client, dataset_id):
+        """Fetch the synced schema as {table: {column: bq_type}}."""
+        schema_map = {}
         dataset_ref = f"{client.project}.{dataset_id}"
-        
+
         try:
-            tables = list(client.list_tables(dataset_ref))
-            for table in tables:
+            for table in client.list_tables(dataset_ref):
                 t = client.get_table(table)
-                schema_summary += f"Table: {table.table_id}\nColumns:\n"
-                for s in t.schema:
-                    schema_summary += f"- {s.name} ({s.field_type})\n"
-                schema_summary += "\n"
+                schema_map[table.table_id] = {s.name: s.field_type for s in t.schema}
         except Exception as e:
             _logger.error(f"Error fetching schema: {e}")
-            schema_summary = "Error fetching schema."
-            
+            return None
+
+        return schema_map
+
+    def _get_schema_summary(self, client, dataset_id, schema_map=None):
+        """Fetch schema summary for the context."""
+        if schema_map is None:
+            schema_map = self._get_schema_map(client, dataset_id)
+        if schema_map is None:
+            return "Error fetching schema."
+
+        schema_summary = ""
+        for table_id, columns in schema_map.items():
+            schema_summary += f"Table: {table_id}\nColumns:\n"
+            for name, field_type in columns.items():
+                schema_summary += f"- {name} ({field_type})\n"
+            schema_summary += "\n"
         return schema_summary
 
+    def _prepare_sql(self, sql, chart_type, client, dataset_id, schema_map):
+        """Validate the generated SQL against the synced schema and rewrite it.
+
+        Unknown tables or columns raise a UserError before any BigQuery job is
+        started. The query is then rewritten: `SELECT *` is expanded and unused
+        columns are pruned from subqueries, a LIMIT matching the chart type is
+        applied to ranked queries, and the SQL is re-rendered in a canonical
+        form so that equivalent questions hit the same BigQuery result cache
+        entry. Output column names keep the spelling of the generated SQL, as
+        `labels_col` and `data_col` refer to them.
+
+        Returns a tuple (sql, tables, row_limit) where tables are the fully
+        qualified names of the referenced tables and row_limit is the LIMIT
+        added or tightened here, or None if the query was not capped.
+        """
+        if not sqlglot:
+            raise UserError(_("SQL parser library is not installed. Please install 'sqlglot'."))
+        if not sql:
+            return sql, [], None
+
+        try:
+            expression = sqlglot.parse_one(sql, read='bigquery')
+        except SqlglotError as e:
+            raise UserError(_("Generated SQL could not be parsed: %s. SQL: %s") % (str(e), sql))
+
+        if not isinstance(expression, exp.Query):
+            raise UserError(_("Generated SQL must be a SELECT query. SQL: %s") % sql)
+
+        cte_names = {cte.alias_or_name for cte in expression.find_all(exp.CTE)}
+        tables = []
+        unknown_tables = []
+        for table in expression.find_all(exp.Table):
+            if not table.db and table.name in cte_names:
+                continue
+            full_name = f"{table.catalog or client.project}.{table.db or dataset_id}.{table.name}"
+            if full_name not in tables:
+                tables.append(full_name)
+            if schema_map is not None and (
+                    (table.catalog or client.project) != client.project
+                    or (table.db or dataset_id) != dataset_id
+                    or table.name not in schema_map):
+                unknown_tables.append(full_name)
+
+        if unknown_tables:
+            raise UserError(_("Generated SQL references unknown table(s): %s. Check synchronization.") % ", ".join(unknown_tables))
+
+        if schema_map is None:
+            # Schema unavailable: only apply the row limit, no validation.
+            expression, row_limit = self._apply_row_limit(expression, chart_type)
+            return expression.sql(dialect='bigquery'), tables, row_limit
+
+        # qualify() lower-cases every identifier, output aliases included.
+        output_names = {
+            select.alias_or_name.lower(): select.alias_or_name
+            for select in expression.selects
+            if select.alias_or_name
+        }
+
+        qualify_schema = {
+            client.project: {
+                dataset_id: schema_map,
+            },
+        }
+        try:
+            expression = qualify(
+                expression,
+                dialect='bigquery',
+                catalog=client.project,
+                db=dataset_id,
+                schema=qualify_schema,
+                validate_qualify_columns=True,
+            )
+            expression = pushdown_projections(expression)
+        except SqlglotError as e:
+            raise UserError(_("Generated SQL does not match the synced schema: %s. SQL: %s") % (str(e), sql))
+
+        # `project.dataset.table` and `project`.`dataset`.`table` must render alike
+        for table in expression.find_all(exp.Table):
+            table.meta.pop('quoted_table', None)
+
+        # BigQuery resolves aliases case-insensitively, so only the result
+        # column names change back.
+        for select in expression.selects:
+            original_name = output_names.get(select.alias_or_name.lower())
+            if isinstance(select, exp.Alias) and original_name and original_name != select.alias_or_name:
+                select.set('alias', exp.to_identifier(original_name, quoted=True))
+
+        expression, row_limit = self._apply_row_limit(expression, chart_type)
+        return expression.sql(dialect='bigquery', comments=False), tables, row_limit
+
+    def _apply_row_limit(self, expression, chart_type):
+        """Add or tighten the outer LIMIT of a ranked query according to the chart type.
+
+        Other queries are left alone: truncating them would drop arbitrary
+        rows, or the most recent ones of a time series ordered by date.
+        Returns a tuple (expression, row_limit) where row_limit is None if the
+        query was not capped.
+        """
+        if not self._is_ranked_query(expression):
+            return expression, None
+        max_rows = CHART_ROW_LIMITS.get(chart_type, CHART_ROW_LIMITS['bar'])
+        limit = expression.args.get('limit')
+        if limit:
+            current = limit.expression
+            if isinstance(current, exp.Literal) and current.is_int and int(current.this) <= max_rows:
+                return expression, None
+        return expression.limit(max_rows, dialect='bigquery', copy=False), max_rows
+
+    def _is_ranked_query(self, expression):
+        """Whether the outer ORDER BY ranks rows by a measure (an aggregate,
+        its alias or its position) rather than by a GROUP BY key."""
+        order = expression.args.get('order')
+        if not order or not order.expressions:
+            return False
+        selects = expression.selects
+        key = order.expressions[0].this
+        if isinstance(key, exp.Literal) and key.is_int:
+            position = int(key.this)
+            return 0 < position <= len(selects) and bool(selects[position - 1].find(exp.AggFunc))
+        if key.find(exp.AggFunc):
+            return True
+        measures = {select.alias_or_name.lower() for select in selects if select.find(exp.AggFunc)}
+        return isinstance(key, exp.Column) and not key.table and key.name.lower() in measures
+
     def generate_chart_data(self):
         """Main method called by UI to generate chart."""
         self.ensure_one()
@@ -77,7 +233,8 @@ class BiDashboardItem(models.Model):
         dataset_id = self.env['ir.config_parameter'].sudo().get_param('odoo_gen_bi.bq_dataset_id', 'odoo_bi')
         
         # 1. Get Schema
-        schema_summary = self._get_schema_summary(client, dataset_id)
+        schema_map = self._get_schema_map(client, dataset_id)
+        schema_summary = self._get_schema_summary(client, dataset_id, schema_map)
         
         # 2. Call Gemini
         config = self.env['ir.config_parameter'].sudo()
@@ -150,6 +307,7 @@ class BiDashboardItem(models.Model):
             
         sql = ai_result.get('sql')
         chart_type = ai_result.get('type', 'bar')
+        sql, tables, row_limit = self._prepare_sql(sql, chart_type, client, dataset_id, schema_map)
         
         self.write({
             'sql_query': sql,
@@ -173,6 +331,9 @@ class BiDashboardItem(models.Model):
                 # This is heuristic and might be improved
                 pass
 
+            if row_limit and results.total_rows >= row_limit:
+                _logger.warning(f"OdooGenBI: Chart {self.name} is limited to the first {row_limit} rows.")
+
             for row in results:
                 # Dynamic access
                 labels.append(row[labels_col])
@@ -206,7 +367,8 @@ class BiDashboardItem(models.Model):
         dataset_id = self.env['ir.config_parameter'].sudo().get_param('odoo_gen_bi.bq_dataset_id', 'odoo_bi')
         
         # 1. Get Schema
-        schema_summary = self.new({})._get_schema_summary(client, dataset_id)
+        schema_map = self.new({})._get_schema_map(client, dataset_id)
+        schema_summary = self.new({})._get_schema_summary(client, dataset_id, schema_map)
 
         # 2. Call Gemini
         config = self.env['ir.config_parameter'].sudo()
@@ -242,6 +404,7 @@ class BiDashboardItem(models.Model):
         2. Use fully qualified table names: `{client.project}.{dataset_id}.table_name`.
         3. Determine the best chart type (bar, line, pie).
         4. Identify columns for labels (X-axis) and data (Y-axis).
+        5. For labels of many2one ids, prefer the `<field>_name` columns when present, otherwise join the `dim_<model>` table on `id`. Many2many/one2many links are in `<table>__<field>` tables (record_id, related_id).
         
         Return ONLY a JSON object with this format:
         {{
@@ -301,6 +464,7 @@ class BiDashboardItem(models.Model):
             
         sql = ai_result.get('sql')
         chart_type = ai_result.get('type', 'bar')
+        sql, tables, row_limit = self.new({})._prepare_sql(sql, chart_type, client, dataset_id, schema_map)
         
         # 3. Execute SQL
         try:
@@ -309,17 +473,9 @@ class BiDashboardItem(models.Model):
             
             warning_msg = False
             if results.total_rows == 0:
-                import re
-                # Simple regex to find table names (e.g. project_id.dataset.table)
-                # Matches FROM `abc` or JOIN `abc`
-                table_pattern = r"(?:FROM|JOIN)\s+`?([\w.-]+)`?"
-                tables = re.findall(table_pattern, sql, re.IGNORECASE)
                 unsynced = []
                 for table_ref in tables:
                      try:
-                         # table_ref might be just "table", need full path if not provided?
-                         # Usually AI provides full path project.dataset.table
-                         # If not, we might fail to find it, which is also a hint.
                          table = client.get_table(table_ref)
                          if table.num_rows == 0:
                              unsynced.append(table_ref)
@@ -328,6 +484,8 @@ class BiDashboardItem(models.Model):
                 
                 if unsynced:
                     warning_msg = _("Chart is empty. Check synchronization for: %s") % ", ".join(unsynced)
+            elif row_limit and results.total_rows >= row_limit:
+                warning_msg = _("Chart is limited to the first %s rows.") % row_limit
 
             labels = []
             data = []
@@ -15,6 +15,27 @@ except ImportError:
     bigquery = None
     service_account = None
 
+# Attributes copied into dimension tables next to id and display_name, when the
+# comodel defines them as stored fields.
+DIMENSION_KEY_FIELDS = ('name', 'code', 'default_code', 'ref', 'email', 'active', 'company_id', 'country_id', 'categ_id')
+
+# Technical comodels (chatter, activities, attachments...) never get a bridge or
+# dimension table: they are large and not chartable.
+EXCLUDED_COMODEL_PREFIXES = ('mail.', 'ir.')
+
+# Incremental dimension syncs re-export records written up to this long before
+# the newest write_date already exported. Odoo stamps write_date with the
+# transaction start time, so a long transaction can commit a write_date older
+# than rows exported meanwhile. Re-merging a few rows twice is harmless.
+DIMENSION_SYNC_OVERLAP = datetime.timedelta(hours=1)
+
+# Legacy type names returned by BigQuery for existing tables
+BQ_TYPE_ALIASES = {
+    'INTEGER': 'INT64',
+    'FLOAT': 'FLOAT64',
+    'BOOLEAN': 'BOOL',
+}
+
 class BiExportConfig(models.Model):
     _name = 'bi.export.config'
     _description = 'BI Export Configuration'
@@ -22,6 +43,9 @@ class BiExportConfig(models.Model):
     name = fields.Char(string="Name", default="Default Configuration", required=True)
     model_ids = fields.Many2many('ir.model', string="Models to Sync", domain=[('transient', '=', False)], help="Select Odoo models to export to BigQuery.")
     last_sync_date = fields.Datetime(string="Last Sync", readonly=True)
+    sync_dimension_tables = fields.Boolean(string="Dimension Tables", help="Export a dim_<model> table (id, display name and key attributes) for every model referenced by a many2one or many2many field.")
+    sync_inline_names = fields.Boolean(string="Inline Many2one Names", help="Add a <field>_name column with the display name next to each many2one id.")
+    sync_x2many_bridges = fields.Boolean(string="x2many Bridge Tables", help="Export a <model>__<field> table (record_id, related_id) for every many2many and one2many field, except technical ones (mail.*, ir.*) and fields inherited from a parent model.")
     
     def _get_bq_client(self):
         """Helper to get BigQuery Client."""
@@ -67,6 +91,9 @@ class BiExportConfig(models.Model):
         """Main method to sync selected models to BigQuery."""
         client = self._get_bq_client()
         dataset_id = self.env['ir.config_parameter'].sudo().get_param('odoo_gen_bi.bq_dataset_id', 'odoo_bi')
+        # Dimension tables not refreshed by the sync started at last_sync_date
+        # are fully reloaded (see _get_dimension_cutoff).
+        sync_start = fields.Datetime.now()
         
         # Ensure Dataset exists
         dataset_ref = f"{client.project}.{dataset_id}"
@@ -79,10 +106,15 @@ class BiExportConfig(models.Model):
             client.create_dataset(dataset)
             _logger.info(f"Created dataset {dataset_id}")
 
+        comodels = set()
         for model in self.model_ids:
-            self._sync_model(client, dataset_id, model)
+            comodels |= self._sync_model(client, dataset_id, model)
+
+        if self.sync_dimension_tables:
+            for comodel_name in sorted(comodels):
+                self._sync_dimension(client, dataset_id, comodel_name, sync_start)
         
-        self.last_sync_date = fields.Datetime.now()
+        self.last_sync_date = sync_start
         
         return {
             'type': 'ir.actions.client',
@@ -95,8 +127,74 @@ class BiExportConfig(models.Model):
             }
         }
 
+    def _convert_value(self, field, val):
+        """Convert an Odoo field value to its JSON/BigQuery representation."""
+        if field.type == 'many2one':
+            return val.id if val else None
+        elif field.type in ('date', 'datetime'):
+            # Odoo returns date/datetime objects or strings depending on context, usually objects in code
+            if val:
+                return val.isoformat() if hasattr(val, 'isoformat') else val
+            return None
+        return val
+
+    def _get_table(self, client, table_id):
+        try:
+            return client.get_table(table_id)
+        except Exception:
+            return None
+
+    def _schema_matches(self, existing_schema, schema):
+        """Whether an existing table has exactly the given columns and types."""
+        def normalize(fields_list):
+            return [(f.name, BQ_TYPE_ALIASES.get(f.field_type, f.field_type)) for f in fields_list]
+        return normalize(existing_schema) == normalize(schema)
+
+    def _load_rows(self, client, table_id, schema, rows, label):
+        """Replace the content of a table with the given rows."""
+        job_config = bigquery.LoadJobConfig(
+            schema=schema,
+            write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,
+            source_format=bigquery.SourceFormat.NEWLINE_DELIMITED_JSON,
+        )
+
+        try:
+            job = client.load_table_from_json(rows, table_id, job_config=job_config)
+            job.result() # Wait for job to complete
+            _logger.info(f"Loaded {len(rows)} rows into {table_id}")
+        except Exception as e:
+            _logger.error(f"Failed to load {label}: {e}")
+            raise UserError(_("Failed to load %s: %s") % (label, str(e)))
+
+    def _merge_rows(self, client, table_id, schema, rows, key_columns, label):
+        """Upsert rows into an existing table through a staging table."""
+        staging_id = f"{table_id}__staging"
+        on = " AND ".join(f"T.{c} = S.{c}" for c in key_columns)
+        update = ", ".join(f"{s.name} = S.{s.name}" for s in schema if s.name not in key_columns)
+        sql = f"MERGE `{table_id}` T USING `{staging_id}` S ON {on}"
+        if update:
+            sql += f" WHEN MATCHED THEN UPDATE SET {update}"
+        sql += " WHEN NOT MATCHED BY TARGET THEN INSERT ROW"
+
+        try:
+            self._load_rows(client, staging_id, schema, rows, label)
+            client.query(sql).result()
+            _logger.info(f"Merged {len(rows)} rows into {table_id}")
+        except UserError:
+            raise
+        except Exception as e:
+            _logger.error(f"Failed to merge {label}: {e}")
+            raise UserError(_("Failed to load %s: %s") % (label, str(e)))
+        finally:
+            # Never leave the staging table behind: it would be offered to the AI as a real table
+            client.delete_table(staging_id, not_found_ok=True)
+
     def _sync_model(self, client, dataset_id, model_record):
-        """Sync a single model."""
+        """Sync a single model.
+
+        Returns the names of the comodels referenced by its many2one and
+        many2many fields, for the dimension tables.
+        """
         table_id = f"{client.project}.{dataset_id}.{model_record.model.replace('.', '_')}"
         
         Model = self.env[model_record.model]
@@ -104,7 +202,7 @@ class BiExportConfig(models.Model):
         records = Model.search([])
         if not records:
             _logger.info(f"No records for {model_record.model}, skipping.")
-            return
+            return set()
 
         # Prepare Schema and Data
         schema = []
@@ -115,45 +213,169 @@ class BiExportConfig(models.Model):
         for fname, field in Model._fields.items():
             if field.store and field.type in ('char', 'text', 'integer', 'float', 'boolean', 'date', 'datetime', 'selection', 'many2one', 'monetary'):
                  valid_fields[fname] = field
+        x2many_fields = self._get_bridge_fields(Model)
+
+        inline_names = []
+        if self.sync_inline_names:
+            inline_names = [
+                fname for fname, field in valid_fields.items()
+                if field.type == 'many2one' and f"{fname}_name" not in Model._fields
+            ]
         
         # Build Schema
         for fname, field in valid_fields.items():
             bq_type = self._map_odoo_type_to_bq(field.type)
             schema.append(bigquery.SchemaField(fname, bq_type))
+        for fname in inline_names:
+            schema.append(bigquery.SchemaField(f"{fname}_name", 'STRING'))
 
         # Build Rows
         for record in records:
             row = {}
             for fname, field in valid_fields.items():
+                row[fname] = self._convert_value(field, record[fname])
+            for fname in inline_names:
                 val = record[fname]
-                
-                # Handle types
-                if field.type == 'many2one':
-                    row[fname] = val.id if val else None
-                elif field.type in ('date', 'datetime'):
-                     # Odoo returns date/datetime objects or strings depending on context, usually objects in code
-                     if val:
-                         row[fname] = val.isoformat() if hasattr(val, 'isoformat') else val
-                     else:
-                         row[fname] = None
-                else:
-                    row[fname] = val
+                row[f"{fname}_name"] = val.display_name if val else None
             rows.append(row)
 
         # Load Data
-        job_config = bigquery.LoadJobConfig(
-            schema=schema,
-            write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,
-            source_format=bigquery.SourceFormat.NEWLINE_DELIMITED_JSON,
-        )
+        self._load_rows(client, table_id, schema, rows, model_record.model)
 
-        try:
-            job = client.load_table_from_json(rows, table_id, job_config=job_config)
-            job.result() # Wait for job to complete
-            _logger.info(f"Loaded {len(rows)} rows into {table_id}")
-        except Exception as e:
-            _logger.error(f"Failed to load {model_record.model}: {e}")
-            raise UserError(_("Failed to load %s: %s") % (model_record.model, str(e)))
+        if self.sync_x2many_bridges:
+            for fname in x2many_fields:
+                self._sync_bridge(client, f"{table_id}__{fname}", records, fname, f"{model_record.model}.{fname}")
+
+        comodels = {
+            field.comodel_name
+            for field in list(valid_fields.values()) + list(x2many_fields.values())
+            if field.type in ('many2one', 'many2many') and not self._is_excluded_comodel(field.comodel_name)
+        }
+        return comodels
+
+    def _is_excluded_comodel(self, comodel_name):
+        return comodel_name.startswith(EXCLUDED_COMODEL_PREFIXES)
+
+    def _get_bridge_fields(self, Model):
+        """Return the x2many fields of a model that get a bridge table."""
+        return {
+            fname: field
+            for fname, field in Model._fields.items()
+            if field.store and field.type in ('many2many', 'one2many')
+            and not field.inherited
+            and not self._is_excluded_comodel(field.comodel_name)
+        }
+
+    def _sync_bridge(self, client, table_id, records, fname, label):
+        """Sync the (record_id, related_id) pairs of an x2many field.
+
+        The table is reloaded on every sync, like the model table itself: an
+        x2many can change without the record's write_date moving (one2many
+        children created or re-parented, many2many edited from the other
+        side, records deleted), so write_date cannot drive an incremental
+        update.
+        """
+        schema = [
+            bigquery.SchemaField('record_id', 'INT64'),
+            bigquery.SchemaField('related_id', 'INT64'),
+        ]
+        rows = [
+            {'record_id': record.id, 'related_id': related.id}
+            for record in records
+            for related in record[fname]
+        ]
+        self._load_rows(client, table_id, schema, rows, label)
+
+    def _sync_dimension(self, client, dataset_id, comodel_name, sync_start):
+        """Sync the dim_<model> table (id, display_name, key attributes) of a comodel.
+
+        When the table is up to date with the previous sync, only records
+        written since its newest write_date (minus DIMENSION_SYNC_OVERLAP), or
+        whose parent was (a contact's display name includes its company's),
+        are exported and merged on id. Otherwise it is fully reloaded.
+        Archived records are kept so that existing facts still get a label.
+
+        Known limitations: records deleted in Odoo are not removed, and other
+        display name dependencies (e.g. a grand-parent rename) are only
+        refreshed by the next write on the record.
+        """
+        if comodel_name not in self.env:
+            return
+        table_id = f"{client.project}.{dataset_id}.dim_{comodel_name.replace('.', '_')}"
+        Model = self.env[comodel_name].with_context(active_test=False)
+
+        schema = [
+            bigquery.SchemaField('id', 'INT64'),
+            bigquery.SchemaField('display_name', 'STRING'),
+            bigquery.SchemaField('write_date', 'TIMESTAMP'),
+        ]
+        key_fields = self._get_dimension_fields(Model)
+        for fname, field in key_fields.items():
+            schema.append(bigquery.SchemaField(fname, self._map_odoo_type_to_bq(field.type)))
+
+        cutoff = self._get_dimension_cutoff(client, table_id, schema)
+        domain = self._get_dimension_domain(Model, cutoff) if cutoff else []
+        records = Model.search(domain)
+        if records:
+            rows = []
+            for record in records:
+                row = {
+                    'id': record.id,
+                    'display_name': record.display_name,
+                    'write_date': self._convert_value(Model._fields['write_date'], record.write_date),
+                }
+                for fname, field in key_fields.items():
+                    row[fname] = self._convert_value(field, record[fname])
+                rows.append(row)
+
+            label = f"dim_{comodel_name}"
+            if cutoff:
+                self._merge_rows(client, table_id, schema, rows, ['id'], label)
+            else:
+                self._load_rows(client, table_id, schema, rows, label)
+
+        self.env['ir.config_parameter'].sudo().set_param(
+            f"odoo_gen_bi.dim_sync.{table_id}", fields.Datetime.to_string(sync_start))
+
+    def _get_dimension_fields(self, Model):
+        """Return the DIMENSION_KEY_FIELDS a comodel stores."""
+        key_fields = {}
+        for fname in DIMENSION_KEY_FIELDS:
+            field = Model._fields.get(fname)
+            if field and field.store and field.type in ('char', 'text', 'integer', 'boolean', 'selection', 'many2one'):
+                key_fields[fname] = field
+        return key_fields
+
+    def _get_dimension_cutoff(self, client, table_id, schema):
+        """Return the write_date from which a dimension table can be merged
+        incrementally, or None if it must be fully reloaded."""
+        table = self._get_table(client, table_id)
+        if not table or not self.last_sync_date:
+            return None
+        if not self._schema_matches(table.schema, schema):
+            _logger.info(f"Schema of {table_id} changed, reloading it.")
+            return None
+        # Skipped by the previous sync (dimensions disabled, comodel no longer
+        # referenced, sync of another config): changes made since may be
+        # older than its newest row.
+        last_refresh = self.env['ir.config_parameter'].sudo().get_param(f"odoo_gen_bi.dim_sync.{table_id}")
+        if last_refresh != fields.Datetime.to_string(self.last_sync_date):
+            _logger.info(f"{table_id} was not refreshed by the previous sync, reloading it.")
+            return None
+
+        rows = list(client.query(f"SELECT MAX(write_date) AS max_write_date FROM `{table_id}`").result())
+        max_write_date = rows[0]['max_write_date'] if rows else None
+        if not max_write_date:
+            return None
+        return max_write_date.astimezone(datetime.timezone.utc).replace(tzinfo=None) - DIMENSION_SYNC_OVERLAP
+
+    def _get_dimension_domain(self, Model, cutoff):
+        """Domain of the records to re-export in an incremental dimension sync."""
+        domain = [('write_date', '>', cutoff)]
+        parent = Model._fields.get('parent_id')
+        if parent and parent.store and parent.type == 'many2one' and parent.comodel_name == Model._name:
+            domain = ['|', ('parent_id.write_date', '>', cutoff)] + domain
+        return domain
 
     @api.model
     def run_scheduler(self):
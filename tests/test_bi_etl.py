@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+from odoo import fields
+from odoo.exceptions import UserError
+from odoo.tests.common import TransactionCase
+
+from odoo.addons.odoo_gen_bi.models.bi_etl import bigquery
+
+
+@unittest.skipIf(not bigquery, "google-cloud-bigquery is not installed")
+class TestBiEtl(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.config = cls.env['bi.export.config'].create({
+            'name': 'Test',
+            'sync_dimension_tables': True,
+            'sync_x2many_bridges': True,
+        })
+        cls.dim_table_id = 'proj.odoo_bi.dim_res_partner'
+
+    def _client(self, tables=None):
+        """Mock client; tables maps existing table ids to their schema."""
+        tables = tables or {}
+        client = MagicMock()
+        client.project = 'proj'
+
+        def get_table(table_id):
+            if table_id not in tables:
+                raise Exception("Not found: %s" % table_id)
+            table = MagicMock()
+            table.schema = tables[table_id]
+            return table
+        client.get_table.side_effect = get_table
+        client.query.return_value.result.return_value = [
+            {'max_write_date': datetime.now(timezone.utc)},
+        ]
+        return client
+
+    def _loads(self, client, table_id):
+        """Return the (rows, job_config) of the load jobs into table_id."""
+        return [
+            (call.args[0], call.kwargs['job_config'])
+            for call in client.load_table_from_json.call_args_list
+            if call.args[1] == table_id
+        ]
+
+    def _merged(self, client):
+        return any('MERGE' in call.args[0] for call in client.query.call_args_list)
+
+    def _partner_dim_schema(self):
+        # Existing tables report legacy type names
+        schema = [
+            bigquery.SchemaField('id', 'INTEGER'),
+            bigquery.SchemaField('display_name', 'STRING'),
+            bigquery.SchemaField('write_date', 'TIMESTAMP'),
+        ]
+        for fname, field in self.config._get_dimension_fields(self.env['res.partner']).items():
+            schema.append(bigquery.SchemaField(fname, self.config._map_odoo_type_to_bq(field.type)))
+        return schema
+
+    def _set_previous_sync(self, table_id):
+        """Pretend table_id was refreshed by the previous sync of the config."""
+        self.config.last_sync_date = fields.Datetime.now() - timedelta(days=1)
+        self.env['ir.config_parameter'].sudo().set_param(
+            f"odoo_gen_bi.dim_sync.{table_id}", fields.Datetime.to_string(self.config.last_sync_date))
+
+    def test_bridge_fields(self):
+        bridge_fields = self.config._get_bridge_fields(self.env['res.partner'])
+        self.assertIn('category_id', bridge_fields)
+        self.assertIn('child_ids', bridge_fields)
+        # Fields coming from _inherits belong to the parent model's table
+        self.assertNotIn('category_id', self.config._get_bridge_fields(self.env['res.users']))
+        self.assertTrue(self.config._is_excluded_comodel('mail.message'))
+        self.assertTrue(self.config._is_excluded_comodel('ir.attachment'))
+        self.assertFalse(self.config._is_excluded_comodel('res.partner'))
+
+    def test_bridge_reloaded_on_sync(self):
+        parent = self.env['res.partner.category'].create({'name': 'Parent'})
+        self.env.cr.execute(
+            "UPDATE res_partner_category SET write_date = %s WHERE id = %s",
+            (fields.Datetime.now() - timedelta(days=2), parent.id))
+        self.env.invalidate_all()
+        self.config.last_sync_date = fields.Datetime.now() - timedelta(days=1)
+        # Created through the child model: the parent's write_date does not move
+        child = self.env['res.partner.category'].create({'name': 'Child', 'parent_id': parent.id})
+
+        table_id = 'proj.odoo_bi.res_partner_category__child_ids'
+        client = self._client(tables={table_id: []})
+        model_record = self.env['ir.model']._get('res.partner.category')
+        self.config._sync_model(client, 'odoo_bi', model_record)
+
+        loads = self._loads(client, table_id)
+        self.assertEqual(len(loads), 1)
+        rows, job_config = loads[0]
+        self.assertIn({'record_id': parent.id, 'related_id': child.id}, rows)
+        self.assertEqual(job_config.write_disposition, bigquery.WriteDisposition.WRITE_TRUNCATE)
+        self.assertFalse(self._merged(client))
+
+    def test_dimension_full_load(self):
+        partner = self.env['res.partner'].create({'name': 'Archived Partner', 'active': False})
+        sync_start = fields.Datetime.now()
+        client = self._client()
+        self.config._sync_dimension(client, 'odoo_bi', 'res.partner', sync_start)
+        rows, job_config = self._loads(client, self.dim_table_id)[0]
+        row = next(row for row in rows if row['id'] == partner.id)
+        self.assertEqual(row['display_name'], 'Archived Partner')
+        self.assertFalse(row['active'])
+        self.assertEqual(
+            self.env['ir.config_parameter'].sudo().get_param(f"odoo_gen_bi.dim_sync.{self.dim_table_id}"),
+            fields.Datetime.to_string(sync_start))
+
+    def test_dimension_domain(self):
+        cutoff = fields.Datetime.now()
+        self.assertIn(('parent_id.write_date', '>', cutoff),
+                      self.config._get_dimension_domain(self.env['res.partner'], cutoff))
+        self.assertEqual(self.config._get_dimension_domain(self.env['res.country'], cutoff),
+                         [('write_date', '>', cutoff)])
+
+    def test_dimension_incremental(self):
+        partner = self.env['res.partner'].create({'name': 'New Partner'})
+        self._set_previous_sync(self.dim_table_id)
+        client = self._client(tables={self.dim_table_id: self._partner_dim_schema()})
+        self.config._sync_dimension(client, 'odoo_bi', 'res.partner', fields.Datetime.now())
+        self.assertFalse(self._loads(client, self.dim_table_id))
+        rows, job_config = self._loads(client, f"{self.dim_table_id}__staging")[0]
+        self.assertIn(partner.id, [row['id'] for row in rows])
+        self.assertTrue(self._merged(client))
+
+    def test_dimension_reloaded_on_schema_change(self):
+        self._set_previous_sync(self.dim_table_id)
+        schema = self._partner_dim_schema()[:-1]
+        client = self._client(tables={self.dim_table_id: schema})
+        self.config._sync_dimension(client, 'odoo_bi', 'res.partner', fields.Datetime.now())
+        self.assertTrue(self._loads(client, self.dim_table_id))
+        self.assertFalse(self._merged(client))
+
+    def test_dimension_reloaded_when_skipped_by_previous_sync(self):
+        self._set_previous_sync(self.dim_table_id)
+        # Refreshed by an older sync only (e.g. dimensions were turned off since)
+        self.config.last_sync_date = fields.Datetime.now() - timedelta(hours=1)
+        client = self._client(tables={self.dim_table_id: self._partner_dim_schema()})
+        self.config._sync_dimension(client, 'odoo_bi', 'res.partner', fields.Datetime.now())
+        self.assertTrue(self._loads(client, self.dim_table_id))
+        self.assertFalse(self._merged(client))
+
+    def test_merge_staging_dropped_on_load_failure(self):
+        client = self._client()
+        client.load_table_from_json.side_effect = Exception("load failed")
+        schema = [bigquery.SchemaField('id', 'INT64')]
+        with self.assertRaises(UserError):
+            self.config._merge_rows(client, self.dim_table_id, schema, [{'id': 1}], ['id'], 'dim_res_partner')
+        client.query.assert_not_called()
+        client.delete_table.assert_called_once_with(f"{self.dim_table_id}__staging", not_found_ok=True)
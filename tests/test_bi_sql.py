@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+import unittest
+from types import SimpleNamespace
+
+from odoo.exceptions import UserError
+from odoo.tests.common import TransactionCase
+
+try:
+    import sqlglot
+except ImportError:
+    sqlglot = None
+
+
+@unittest.skipIf(not sqlglot, "sqlglot is not installed")
+class TestBiSql(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Item = cls.env['bi.dashboard.item']
+        cls.client = SimpleNamespace(project='proj')
+        cls.schema_map = {
+            'sale_order': {
+                'id': 'INTEGER',
+                'name': 'STRING',
+                'amount_total': 'FLOAT',
+                'partner_id': 'INTEGER',
+                'partner_id_name': 'STRING',
+            },
+            'res_partner': {
+                'id': 'INTEGER',
+                'name': 'STRING',
+            },
+        }
+
+    def _prepare(self, sql, chart_type='bar'):
+        return self.Item._prepare_sql(sql, chart_type, self.client, 'odoo_bi', self.schema_map)
+
+    def test_unknown_table(self):
+        with self.assertRaisesRegex(UserError, 'unknown table'):
+            self._prepare("SELECT name FROM `proj.odoo_bi.product_product`")
+
+    def test_unknown_table_other_project(self):
+        with self.assertRaisesRegex(UserError, 'other_proj.odoo_bi.sale_order'):
+            self._prepare("SELECT name FROM `other_proj.odoo_bi.sale_order`")
+
+    def test_unknown_column(self):
+        with self.assertRaisesRegex(UserError, 'does not match the synced schema'):
+            self._prepare("SELECT name, margin FROM sale_order")
+        with self.assertRaisesRegex(UserError, 'does not match the synced schema'):
+            self._prepare("SELECT so.name, so.margin FROM `proj.odoo_bi.sale_order` so")
+
+    def test_tables(self):
+        sql, tables, row_limit = self._prepare(
+            "SELECT p.name, SUM(so.amount_total) AS total FROM sale_order so "
+            "JOIN `proj.odoo_bi.res_partner` p ON p.id = so.partner_id GROUP BY 1")
+        self.assertEqual(tables, ['proj.odoo_bi.sale_order', 'proj.odoo_bi.res_partner'])
+
+    def test_star_expansion(self):
+        sql, tables, row_limit = self._prepare(
+            "SELECT name, total FROM (SELECT *, amount_total AS total FROM sale_order)")
+        self.assertNotIn('*', sql)
+        self.assertNotIn('partner_id', sql)
+        self.assertIn('`amount_total`', sql)
+
+    def test_limit_added_to_ordered_query(self):
+        sql, tables, row_limit = self._prepare(
+            "SELECT name, SUM(amount_total) AS total FROM sale_order GROUP BY name ORDER BY total DESC", 'pie')
+        self.assertTrue(sql.endswith('LIMIT 12'))
+        self.assertEqual(row_limit, 12)
+
+    def test_limit_tightened(self):
+        sql, tables, row_limit = self._prepare(
+            "SELECT name, SUM(amount_total) AS total FROM sale_order GROUP BY name ORDER BY total DESC LIMIT 500", 'bar')
+        self.assertTrue(sql.endswith('LIMIT 50'))
+        self.assertEqual(row_limit, 50)
+
+    def test_smaller_limit_kept(self):
+        sql, tables, row_limit = self._prepare(
+            "SELECT name, SUM(amount_total) AS total FROM sale_order GROUP BY name ORDER BY total DESC LIMIT 5", 'bar')
+        self.assertTrue(sql.endswith('LIMIT 5'))
+        self.assertIsNone(row_limit)
+
+    def test_ordinal_measure_limited(self):
+        sql, tables, row_limit = self._prepare(
+            "SELECT partner_id_name, SUM(amount_total) FROM sale_order GROUP BY 1 ORDER BY 2 DESC", 'pie')
+        self.assertTrue(sql.endswith('LIMIT 12'))
+        self.assertEqual(row_limit, 12)
+
+    def test_time_series_not_limited(self):
+        sql, tables, row_limit = self._prepare(
+            "SELECT name AS month, SUM(amount_total) AS total FROM sale_order GROUP BY month ORDER BY month", 'bar')
+        self.assertNotIn('LIMIT', sql)
+        self.assertIsNone(row_limit)
+
+    def test_unordered_query_not_limited(self):
+        sql, tables, row_limit = self._prepare("SELECT name, amount_total FROM sale_order", 'bar')
+        self.assertNotIn('LIMIT', sql)
+        self.assertIsNone(row_limit)
+
+    def test_alias_case_preserved(self):
+        sql, tables, row_limit = self._prepare(
+            "SELECT partner_id_name AS Partner, SUM(amount_total) AS TotalSales "
+            "FROM sale_order GROUP BY Partner ORDER BY TotalSales DESC")
+        self.assertIn('AS `Partner`', sql)
+        self.assertIn('AS `TotalSales`', sql)
+        output_names = [select.alias_or_name for select in sqlglot.parse_one(sql, read='bigquery').selects]
+        self.assertEqual(output_names, ['Partner', 'TotalSales'])
+
+    def test_equivalent_queries_normalized(self):
+        sql_a, tables, row_limit = self._prepare("select name from sale_order")
+        sql_b, tables, row_limit = self._prepare("SELECT  name\nFROM `proj.odoo_bi.sale_order`")
+        self.assertEqual(sql_a, sql_b)